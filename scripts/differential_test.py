@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+給与計算エンジンの差分テストスクリプト
+基準となるprocess_payrollと代替エンジンに同じランダム入力を与えて結果を突き合わせ、
+最初に食い違った項目を報告します。エンジンごとのスループットを基準値と比較し、
+一定以上低下した場合は失敗とします。
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from calculate_payroll import (
+    process_payroll,
+    calculate_social_insurance,
+    DEPENDENT_DEDUCTION,
+    OVERTIME_THRESHOLD_1,
+    OVERTIME_THRESHOLD_2,
+)
+from employee_store import build_store
+from payroll_async import process_payroll_async
+from payroll_journal import process_payroll_checkpointed
+
+GRADE_TABLE = {
+    "G1": {"insurance_rate": 0.145, "base_deduction": 5000},
+    "G2": {"insurance_rate": 0.145, "base_deduction": 5000},
+    "G3": {"insurance_rate": 0.150, "base_deduction": 8000},
+    "G4": {"insurance_rate": 0.150, "base_deduction": 8000},
+    "G5": {"insurance_rate": 0.155, "base_deduction": 10000}
+}
+
+# 計算ルールの境界値
+BOUNDARY_HOURS = [0, 0.25, 0.5, 1,
+                  OVERTIME_THRESHOLD_1 - 0.5, OVERTIME_THRESHOLD_1, OVERTIME_THRESHOLD_1 + 0.5,
+                  OVERTIME_THRESHOLD_2 - 0.5, OVERTIME_THRESHOLD_2, OVERTIME_THRESHOLD_2 + 0.5]
+BOUNDARY_ABSENCE_DAYS = [0, 1, 3, 4, 20]
+BOUNDARY_TARDINESS = [0, 1, 3, 4, 10]
+BOUNDARY_SALARIES = [0, 159, 160, 161, 1000000]    # 時間単価の切り捨て境界
+TAX_BRACKET_EDGES = [0, 162500, 275000]            # 課税所得の税率区分境界
+
+TAX_EDGE_RATIO = 0.25    # 課税所得を税率区分境界に合わせるケースの割合
+
+Engine = Callable[[Dict], Dict]
+
+
+def _pick(rng: random.Random, boundary: List, low: float, high: float, step: float = 1) -> Any:
+    """半分は境界値、残りは範囲内のランダム値を返す"""
+    if rng.random() < 0.5:
+        return rng.choice(boundary)
+    return rng.randint(int(low / step), int(high / step)) * step
+
+
+def taxable_income(base_salary: int, commute_allowance: int, grade_info: Dict, dependents: int) -> int:
+    """勤怠控除・手当がない場合の課税所得"""
+    gross_pay = base_salary + commute_allowance
+    social_insurance = calculate_social_insurance(gross_pay, commute_allowance, grade_info['insurance_rate'])
+    return gross_pay - social_insurance - grade_info['base_deduction'] - DEPENDENT_DEDUCTION * dependents
+
+
+def salary_for_taxable_income(target: int, commute_allowance: int, grade_info: Dict,
+                              dependents: int) -> Optional[int]:
+    """
+    勤怠控除・手当がない場合に課税所得がtargetとなる基本給を逆算
+    課税所得は基本給に対して単調非減少なので、近似値から二分探索します。
+    該当する基本給がない場合（端数処理で飛ばされる値）はNoneを返します。
+    """
+    lo, hi = 0, 2 * (target + grade_info['base_deduction'] + DEPENDENT_DEDUCTION * dependents) + 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if taxable_income(mid, commute_allowance, grade_info, dependents) < target:
+            lo = mid + 1
+        else:
+            hi = mid
+    if taxable_income(lo, commute_allowance, grade_info, dependents) != target:
+        return None
+    return lo
+
+
+def _tax_edge_case(rng: random.Random, employee: Dict, attendance: Dict) -> None:
+    """従業員を課税所得が税率区分境界（±1円）になるように書き換える"""
+    grade_info = GRADE_TABLE[employee['grade']]
+    for _ in range(3):
+        target = rng.choice(TAX_BRACKET_EDGES) + rng.choice([-1, 0, 1])
+        salary = salary_for_taxable_income(target, employee['commute_allowance'], grade_info,
+                                           employee['dependents'])
+        if salary is not None:
+            employee['base_salary'] = salary
+            for field in list(attendance):
+                if field != 'employee_id':
+                    attendance[field] = 0
+            return
+
+
+def generate_input(rng: random.Random, count: int, start: int = 0) -> Dict:
+    """従業員・勤怠データを1バッチ分生成"""
+    employees = []
+    attendance = []
+
+    for i in range(start, start + count):
+        emp_id = f"T{i:09d}"
+        employee = {
+            'id': emp_id,
+            'name': f"テスト{i}",
+            'department': "検証部",
+            'grade': rng.choice(list(GRADE_TABLE)),
+            'base_salary': _pick(rng, BOUNDARY_SALARIES, 100000, 1200000),
+            'commute_allowance': _pick(rng, [0], 0, 50000),
+            'dependents': rng.randint(0, 6)
+        }
+        att = {
+            'employee_id': emp_id,
+            'regular_overtime_hours': _pick(rng, BOUNDARY_HOURS, 0, 100, 0.25),
+            'late_night_overtime_hours': _pick(rng, BOUNDARY_HOURS[:4], 0, 30, 0.25),
+            'holiday_work_hours': _pick(rng, BOUNDARY_HOURS[:4], 0, 40, 0.25),
+            'holiday_late_night_hours': _pick(rng, BOUNDARY_HOURS[:4], 0, 16, 0.25),
+            'absence_days': _pick(rng, BOUNDARY_ABSENCE_DAYS, 0, 20),
+            'tardiness_count': _pick(rng, BOUNDARY_TARDINESS, 0, 15)
+        }
+        if rng.random() < TAX_EDGE_RATIO:
+            _tax_edge_case(rng, employee, att)
+
+        employees.append(employee)
+        attendance.append(att)
+
+    return {
+        'employees': employees,
+        'attendance': attendance,
+        'grade_table': GRADE_TABLE
+    }
+
+
+def first_difference(expected: Any, actual: Any, path: str = "") -> Optional[Tuple[str, Any, Any]]:
+    """最初に食い違った項目を (パス, 期待値, 実際の値) で返す（一致すればNone）"""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected:
+            if key not in actual:
+                return (f"{path}.{key}".lstrip('.'), expected[key], "<missing>")
+            diff = first_difference(expected[key], actual[key], f"{path}.{key}")
+            if diff:
+                return diff
+        for key in actual:
+            if key not in expected:
+                return (f"{path}.{key}".lstrip('.'), "<missing>", actual[key])
+        return None
+
+    if isinstance(expected, list) and isinstance(actual, list):
+        for i, (exp, act) in enumerate(zip(expected, actual)):
+            diff = first_difference(exp, act, f"{path}[{i}]")
+            if diff:
+                return diff
+        if len(expected) != len(actual):
+            return (f"{path}.length".lstrip('.'), len(expected), len(actual))
+        return None
+
+    if type(expected) is not type(actual) or expected != actual:
+        return (path.lstrip('.'), expected, actual)
+    return None
+
+
+def _async_engine(input_data: Dict) -> Dict:
+    return asyncio.run(process_payroll_async(input_data))
+
+
+def _journal_engine(input_data: Dict) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        return process_payroll_checkpointed(input_data, os.path.join(tmp, 'payroll.journal'))
+
+
+def _store_engine(input_data: Dict) -> Dict:
+    # 生成するIDは昇順なので、ストアのemployee_id順と入力順が一致する
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'master')
+        build_store(path, input_data['employees'], input_data['attendance'])
+        return process_payroll({'employee_store': path, 'grade_table': input_data['grade_table']})
+
+
+BUILTIN_ENGINES = {
+    'async': _async_engine,
+    'journal': _journal_engine,
+    'store': _store_engine
+}
+
+
+def load_engine(spec: str) -> Engine:
+    """組み込みエンジン名または 'module:function' からエンジンを取得"""
+    if spec in BUILTIN_ENGINES:
+        return BUILTIN_ENGINES[spec]
+    module_name, _, func_name = spec.partition(':')
+    if not func_name:
+        raise ValueError(f"不明なエンジンです: {spec}（組み込み名または module:function で指定）")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _timed(engine: Engine, input_data: Dict) -> Tuple[Dict, float]:
+    started = time.perf_counter()
+    output = engine(input_data)
+    return output, time.perf_counter() - started
+
+
+def run_differential(engines: Dict[str, Engine], cases: int, batch_size: int, seed: int) -> Dict:
+    """
+    基準エンジンと各代替エンジンを生成した入力で実行して比較
+    代替エンジンは最初の食い違いで打ち切ります。
+    """
+    rng = random.Random(seed)
+    elapsed = {name: 0.0 for name in ['reference'] + list(engines)}
+    processed = {name: 0 for name in elapsed}
+    divergences = {}
+    done = 0
+
+    while done < cases:
+        count = min(batch_size, cases - done)
+        input_data = generate_input(rng, count, done)
+
+        expected, seconds = _timed(process_payroll, input_data)
+        elapsed['reference'] += seconds
+        processed['reference'] += count
+
+        for name, engine in engines.items():
+            if name in divergences:
+                continue
+            actual, seconds = _timed(engine, input_data)
+            elapsed[name] += seconds
+            processed[name] += count
+
+            diff = first_difference(expected, actual)
+            if diff:
+                field, exp, act = diff
+                index = None
+                if field.startswith('results['):
+                    index = int(field[len('results['):field.index(']')])
+                divergences[name] = {
+                    'field': field,
+                    'expected': exp,
+                    'actual': act,
+                    'employee': input_data['employees'][index] if index is not None else None,
+                    'attendance': input_data['attendance'][index] if index is not None else None
+                }
+
+        done += count
+
+    throughput = {name: (processed[name] / seconds if seconds > 0 else float('inf'))
+                  for name, seconds in elapsed.items()}
+    return {
+        'cases': cases,
+        'seed': seed,
+        'divergences': divergences,
+        'throughput': throughput
+    }
+
+
+def check_throughput(throughput: Dict[str, float], baseline: Dict[str, float],
+                     max_regression: float) -> List[str]:
+    """スループット（人/秒）を基準値と比較し、許容値を超えて低下したものを返す"""
+    regressions = []
+    for name, value in throughput.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        drop = (base - value) / base * 100
+        if drop > max_regression:
+            regressions.append(f"{name}: {value:,.0f}人/秒（基準 {base:,.0f}人/秒, -{drop:.1f}%）")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="給与計算エンジンの差分テスト")
+    parser.add_argument('engines', nargs='*', default=['async'],
+                        help="組み込みエンジン名（async, journal, store）または module:function")
+    parser.add_argument('--cases', type=int, default=100000, help="生成する従業員数")
+    parser.add_argument('--batch-size', type=int, default=10000, help="1バッチあたりの従業員数")
+    parser.add_argument('--seed', type=int, default=0, help="乱数シード")
+    parser.add_argument('--baseline', help="スループット基準値のJSONファイル")
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help="許容するスループット低下率（%%、既定: 10）")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="計測したスループットを基準値ファイルに書き込む")
+    args = parser.parse_args()
+
+    try:
+        engines = {spec: load_engine(spec) for spec in args.engines}
+        result = run_differential(engines, args.cases, args.batch_size, args.seed)
+
+        print("=" * 60)
+        print("差分テスト結果")
+        print("=" * 60)
+        print(f"ケース数: {result['cases']:,}（seed={result['seed']}）")
+
+        for name in engines:
+            div = result['divergences'].get(name)
+            if div is None:
+                print(f"\n[{name}] 一致")
+                continue
+            print(f"\n[{name}] 不一致: {div['field']}")
+            print(f"  期待値={div['expected']!r}, 実際={div['actual']!r}")
+            if div['employee'] is not None:
+                print(f"  従業員={json.dumps(div['employee'], ensure_ascii=False)}")
+                print(f"  勤怠={json.dumps(div['attendance'], ensure_ascii=False)}")
+
+        print("\nスループット（人/秒）:")
+        for name, value in result['throughput'].items():
+            print(f"  {name}: {value:,.0f}")
+
+        regressions = []
+        if args.baseline:
+            if args.update_baseline:
+                with open(args.baseline, 'w', encoding='utf-8') as f:
+                    json.dump(result['throughput'], f, indent=2)
+                print(f"\n基準値を {args.baseline} に保存しました。")
+            else:
+                with open(args.baseline, 'r', encoding='utf-8') as f:
+                    baseline = json.load(f)
+                regressions = check_throughput(result['throughput'], baseline, args.max_regression)
+                for r in regressions:
+                    print(f"  性能低下 {r}")
+
+        failed = bool(result['divergences'] or regressions)
+        print("\n" + "=" * 60)
+        print(f"結果: {'FAIL' if failed else 'PASS'}")
+        print("=" * 60)
+
+        sys.exit(1 if failed else 0)
+
+    except FileNotFoundError as e:
+        print(f"Error: ファイルが見つかりません: {e}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: JSONの解析に失敗しました: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+従業員マスタストア
+従業員データと勤怠データを固定長レコードファイル（.dat）に格納し、
+employee_idでソートされたインデックス（.idx）をメモリマップして参照します。
+全件をメモリに読み込まずに1人分の検索・結合ができます。
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from calculate_payroll import calculate_employee_payroll
+
+# レコード形式
+# 削除フラグ, 整数フラグ, ID, 氏名, 部署, 等級, 基本給, 通勤手当, 扶養人数,
+# 平日残業, 深夜残業, 休日出勤, 休日深夜, 欠勤日数, 遅刻回数
+RECORD = struct.Struct('<BB16s64s32s8sqqidddddd')
+ATTENDANCE_FIELDS = (
+    'regular_overtime_hours',
+    'late_night_overtime_hours',
+    'holiday_work_hours',
+    'holiday_late_night_hours',
+    'absence_days',
+    'tardiness_count'
+)
+INDEX_ENTRY = struct.Struct('<16sI')
+
+FLAG_ACTIVE = 0
+FLAG_DELETED = 1
+
+DATA_SUFFIX = '.dat'
+INDEX_SUFFIX = '.idx'
+
+
+def _encode(value: str, size: int, field: str) -> bytes:
+    encoded = value.encode('utf-8')
+    if len(encoded) > size:
+        raise ValueError(f"{field} is too long ({len(encoded)} > {size} bytes): {value}")
+    return encoded
+
+
+def _decode(value: bytes) -> str:
+    return value.rstrip(b'\x00').decode('utf-8')
+
+
+def _key(employee_id: str) -> bytes:
+    return _encode(employee_id, 16, 'employee_id').ljust(16, b'\x00')
+
+
+def pack_record(employee: Dict, attendance: Dict, flag: int = FLAG_ACTIVE) -> bytes:
+    """
+    従業員と勤怠を1レコードに変換
+    勤怠の数値はdoubleで格納し、整数だった項目は整数フラグに記録します。
+    """
+    values = [attendance.get(field, 0) for field in ATTENDANCE_FIELDS]
+    int_mask = 0
+    for bit, value in enumerate(values):
+        if isinstance(value, int):
+            int_mask |= 1 << bit
+
+    return RECORD.pack(
+        flag,
+        int_mask,
+        _encode(employee['id'], 16, 'employee_id'),
+        _encode(employee['name'], 64, 'name'),
+        _encode(employee['department'], 32, 'department'),
+        _encode(employee['grade'], 8, 'grade'),
+        employee['base_salary'],
+        employee['commute_allowance'],
+        employee.get('dependents', 0),
+        *values
+    )
+
+
+def unpack_record(data: bytes) -> Tuple[int, Dict, Dict]:
+    """レコードを (削除フラグ, 従業員, 勤怠) に変換"""
+    (flag, int_mask, emp_id, name, department, grade, base_salary, commute_allowance,
+     dependents, *values) = RECORD.unpack(data)
+
+    emp_id = _decode(emp_id)
+    employee = {
+        'id': emp_id,
+        'name': _decode(name),
+        'department': _decode(department),
+        'grade': _decode(grade),
+        'base_salary': base_salary,
+        'commute_allowance': commute_allowance,
+        'dependents': dependents
+    }
+    attendance = {'employee_id': emp_id}
+    for bit, (field, value) in enumerate(zip(ATTENDANCE_FIELDS, values)):
+        attendance[field] = int(value) if int_mask & (1 << bit) else value
+    return flag, employee, attendance
+
+
+def _map_file(path: str) -> Optional[mmap.mmap]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _write_index(index_path: str, entries: Iterator[Tuple[bytes, int]]) -> None:
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for key, record_no in entries:
+            f.write(INDEX_ENTRY.pack(key, record_no))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, index_path)
+
+
+def build_store(path: str, employees: List[Dict], attendance_list: List[Dict]) -> None:
+    """入力データからストアを新規作成"""
+    attendance_map = {a['employee_id']: a for a in attendance_list}
+    entries = sorted((_key(emp['id']), record_no) for record_no, emp in enumerate(employees))
+    for prev, cur in zip(entries, entries[1:]):
+        if prev[0] == cur[0]:
+            raise ValueError(f"Duplicate employee_id: {_decode(cur[0])}")
+
+    with open(path + DATA_SUFFIX, 'wb') as f:
+        for emp in employees:
+            f.write(pack_record(emp, attendance_map.get(emp['id'], {})))
+
+    _write_index(path + INDEX_SUFFIX, iter(entries))
+
+
+class EmployeeStore:
+    """メモリマップされた従業員マスタ"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = _map_file(path + DATA_SUFFIX)
+        self._index = _map_file(path + INDEX_SUFFIX)
+        self._count = len(self._index) // INDEX_ENTRY.size if self._index else 0
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index_entry(self, position: int) -> Tuple[bytes, int]:
+        offset = position * INDEX_ENTRY.size
+        return INDEX_ENTRY.unpack_from(self._index, offset)
+
+    def _find(self, employee_id: str) -> Optional[int]:
+        """インデックスを二分探索してレコード番号を返す"""
+        key = _key(employee_id)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, record_no = self._index_entry(mid)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return record_no
+        return None
+
+    def _record(self, record_no: int) -> Tuple[int, Dict, Dict]:
+        offset = record_no * RECORD.size
+        return unpack_record(self._data[offset:offset + RECORD.size])
+
+    def get(self, employee_id: str) -> Optional[Tuple[Dict, Dict]]:
+        """employee_idで (従業員, 勤怠) を取得"""
+        record_no = self._find(employee_id)
+        if record_no is None:
+            return None
+        flag, employee, attendance = self._record(record_no)
+        if flag == FLAG_DELETED:
+            return None
+        return employee, attendance
+
+    def __contains__(self, employee_id: str) -> bool:
+        return self.get(employee_id) is not None
+
+    def __iter__(self) -> Iterator[Tuple[Dict, Dict]]:
+        """employee_id順に (従業員, 勤怠) を返す"""
+        for position in range(self._count):
+            _, record_no = self._index_entry(position)
+            flag, employee, attendance = self._record(record_no)
+            if flag == FLAG_ACTIVE:
+                yield employee, attendance
+
+
+def apply_changes(path: str, hires: List[Tuple[Dict, Dict]], leaver_ids: List[str]) -> None:
+    """
+    入社・退職をストアに反映
+    - 入社: 既存IDはレコードを上書き、新規IDはレコードを末尾に追加
+    - 退職: レコードに削除フラグを立て、インデックスから除外
+    変更内容はすべて検証してから書き込みます。
+    インデックスは既存のソート済みエントリと変更分をマージして再生成します。
+    """
+    leavers = {_key(emp_id) for emp_id in leaver_ids}
+    hires = sorted(hires, key=lambda h: _key(h[0]['id']))
+
+    for prev, cur in zip(hires, hires[1:]):
+        if prev[0]['id'] == cur[0]['id']:
+            raise ValueError(f"Duplicate employee_id: {cur[0]['id']}")
+    for employee, _ in hires:
+        if _key(employee['id']) in leavers:
+            raise ValueError(f"Employee is both hired and leaving: {employee['id']}")
+
+    with EmployeeStore(path) as store, open(path + DATA_SUFFIX, 'r+b') as f:
+        f.seek(0, os.SEEK_END)
+        next_record_no = f.tell() // RECORD.size
+
+        # 書き込み前にレコードを作成して内容を検証する
+        writes = []
+        new_entries = []
+        for employee, attendance in hires:
+            record = pack_record(employee, attendance)
+            record_no = store._find(employee['id'])
+            if record_no is None:
+                record_no = next_record_no
+                next_record_no += 1
+                new_entries.append((_key(employee['id']), record_no))
+            writes.append((record_no, record))
+
+        for emp_id in leaver_ids:
+            record_no = store._find(emp_id)
+            if record_no is not None:
+                writes.append((record_no, bytes([FLAG_DELETED])))
+
+        for record_no, data in writes:
+            f.seek(record_no * RECORD.size)
+            f.write(data)
+
+        f.flush()
+        os.fsync(f.fileno())
+
+        def merged() -> Iterator[Tuple[bytes, int]]:
+            added = iter(new_entries)
+            pending = next(added, None)
+            for position in range(len(store)):
+                entry = store._index_entry(position)
+                while pending is not None and pending[0] < entry[0]:
+                    yield pending
+                    pending = next(added, None)
+                if entry[0] not in leavers:
+                    yield entry
+            while pending is not None:
+                yield pending
+                pending = next(added, None)
+
+        _write_index(path + INDEX_SUFFIX, merged())
+
+
+def calculate_from_store(store: EmployeeStore, employee_id: str, grade_table: Dict) -> Optional[Dict]:
+    """ストアから1人分の給与を計算"""
+    found = store.get(employee_id)
+    if found is None:
+        return None
+    employee, attendance = found
+    return calculate_employee_payroll(employee, attendance, grade_table)
+
+
+def process_payroll_from_store(store: EmployeeStore, grade_table: Dict) -> Dict:
+    """
+    ストアの全従業員の給与計算を処理（process_payrollと同じ出力形式）
+    結果はemployee_id順に並びます。
+    """
+    results = []
+    summary = {
+        'total_gross_pay': 0,
+        'total_deductions': 0,
+        'total_net_pay': 0,
+        'employee_count': 0
+    }
+
+    for employee, attendance in store:
+        result = calculate_employee_payroll(employee, attendance, grade_table)
+        results.append(result)
+        summary['total_gross_pay'] += result['gross_pay']
+        summary['total_deductions'] += result['statutory_deductions']['total']
+        summary['total_net_pay'] += result['net_pay']
+        summary['employee_count'] += 1
+
+    return {
+        'results': results,
+        'summary': summary,
+        'grade_table': grade_table
+    }
+
+
+def main():
+    usage = ("Usage:\n"
+             "  python employee_store.py build <input.json> <store>\n"
+             "  python employee_store.py apply <store> <changes.json>\n"
+             "  python employee_store.py lookup <store> <employee_id> [input.json]")
+
+    if len(sys.argv) < 4:
+        print(usage)
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    try:
+        if command == 'build':
+            with open(sys.argv[2], 'r', encoding='utf-8') as f:
+                input_data = json.load(f)
+            build_store(sys.argv[3], input_data['employees'], input_data['attendance'])
+            print(f"ストアを作成しました: {sys.argv[3]} ({len(input_data['employees'])}件)")
+
+        elif command == 'apply':
+            # changes.json: {"hires": {"employees": [...], "attendance": [...]}, "leavers": ["E001", ...]}
+            with open(sys.argv[3], 'r', encoding='utf-8') as f:
+                changes = json.load(f)
+            hires_data = changes.get('hires', {})
+            attendance_map = {a['employee_id']: a for a in hires_data.get('attendance', [])}
+            hires = [(emp, attendance_map.get(emp['id'], {})) for emp in hires_data.get('employees', [])]
+            leavers = changes.get('leavers', [])
+            apply_changes(sys.argv[2], hires, leavers)
+            print(f"変更を反映しました: 入社 {len(hires)}件, 退職 {len(leavers)}件")
+
+        elif command == 'lookup':
+            with EmployeeStore(sys.argv[2]) as store:
+                found = store.get(sys.argv[3])
+                if found is None:
+                    print(f"Error: 従業員が見つかりません: {sys.argv[3]}")
+                    sys.exit(1)
+                if len(sys.argv) > 4:
+                    with open(sys.argv[4], 'r', encoding='utf-8') as f:
+                        grade_table = json.load(f)['grade_table']
+                    output = calculate_employee_payroll(found[0], found[1], grade_table)
+                else:
+                    output = {'employee': found[0], 'attendance': found[1]}
+            print(json.dumps(output, ensure_ascii=False, indent=2))
+
+        else:
+            print(usage)
+            sys.exit(1)
+
+    except FileNotFoundError as e:
+        print(f"Error: ファイルが見つかりません: {e}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: JSONの解析に失敗しました: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,136 +8,137 @@ import json
 import sys
 
 try:
-      from openpyxl import Workbook
-      from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-      from openpyxl.utils import get_column_letter
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.utils import get_column_letter
 except ImportError:
-      print("Error: openpyxl is not installed.")
-      print("Install with: pip install openpyxl")
-      sys.exit(1)
+    print("Error: openpyxl is not installed.")
+    print("Install with: pip install openpyxl")
+    sys.exit(1)
 
 
 def create_master_sheet(wb, employees, grade_table):
-      """Create master data sheet"""
-      ws = wb.create_sheet("Master")
+    """Create master data sheet"""
+    ws = wb.create_sheet("Master")
 
     # Header
-      headers = ["ID", "Name", "Department", "Grade", "Base Salary", "Commute", "Dependents"]
-      for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-
-      # Employee data
-      for row, emp in enumerate(employees, 2):
-                ws.cell(row=row, column=1, value=emp['employee_id'])
-                ws.cell(row=row, column=2, value=emp['employee_name'])
-                ws.cell(row=row, column=3, value=emp['department'])
-                ws.cell(row=row, column=4, value=emp['grade'])
-                ws.cell(row=row, column=5, value=emp['base_salary'])
-                ws.cell(row=row, column=6, value=emp['commute_allowance'])
-                ws.cell(row=row, column=7, value=emp['dependents'])
-
-      # Grade table
-      ws.cell(row=6, column=1, value="Grade Table")
-      ws.cell(row=7, column=1, value="Grade")
-      ws.cell(row=7, column=2, value="Insurance Rate")
-      ws.cell(row=7, column=3, value="Base Deduction")
-
-    row = 8
+    headers = ["ID", "Name", "Department", "Grade", "Base Salary", "Commute", "Dependents"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
+
+    # Employee data
+    for row, emp in enumerate(employees, 2):
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=emp['employee_name'])
+        ws.cell(row=row, column=3, value=emp['department'])
+        ws.cell(row=row, column=4, value=emp['grade'])
+        ws.cell(row=row, column=5, value=emp['base_salary'])
+        ws.cell(row=row, column=6, value=emp['commute_allowance'])
+        ws.cell(row=row, column=7, value=emp['dependents'])
+
+    # Grade table (below the employee rows)
+    row = len(employees) + 3
+    ws.cell(row=row, column=1, value="Grade Table")
+    ws.cell(row=row + 1, column=1, value="Grade")
+    ws.cell(row=row + 1, column=2, value="Insurance Rate")
+    ws.cell(row=row + 1, column=3, value="Base Deduction")
+
+    row += 2
     for grade, info in grade_table.items():
-              ws.cell(row=row, column=1, value=grade)
-              ws.cell(row=row, column=2, value=info['insurance_rate'])
-              ws.cell(row=row, column=3, value=info['base_deduction'])
-              row += 1
+        ws.cell(row=row, column=1, value=grade)
+        ws.cell(row=row, column=2, value=info['insurance_rate'])
+        ws.cell(row=row, column=3, value=info['base_deduction'])
+        row += 1
 
     return ws
 
 
 def create_attendance_sheet(wb, employees):
-      """Create attendance sheet"""
-      ws = wb.create_sheet("Attendance")
+    """Create attendance sheet"""
+    ws = wb.create_sheet("Attendance")
 
     headers = ["ID", "Regular OT", "Late Night OT", "Holiday", "Holiday Night", "Absence", "Tardiness"]
     for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
 
     for row, emp in enumerate(employees, 2):
-              att = emp['attendance']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=att['regular_overtime_hours'])
-              ws.cell(row=row, column=3, value=att['late_night_overtime_hours'])
-              ws.cell(row=row, column=4, value=att['holiday_work_hours'])
-              ws.cell(row=row, column=5, value=att['holiday_late_night_hours'])
-              ws.cell(row=row, column=6, value=att['absence_days'])
-              ws.cell(row=row, column=7, value=att['tardiness_count'])
+        att = emp['attendance']
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=att['regular_overtime_hours'])
+        ws.cell(row=row, column=3, value=att['late_night_overtime_hours'])
+        ws.cell(row=row, column=4, value=att['holiday_work_hours'])
+        ws.cell(row=row, column=5, value=att['holiday_late_night_hours'])
+        ws.cell(row=row, column=6, value=att['absence_days'])
+        ws.cell(row=row, column=7, value=att['tardiness_count'])
 
     return ws
 
 
 def create_allowance_sheet(wb, employees):
-      """Create allowance calculation sheet"""
-      ws = wb.create_sheet("Allowances")
+    """Create allowance calculation sheet"""
+    ws = wb.create_sheet("Allowances")
 
     headers = ["ID", "Hourly Rate", "Regular OT", "Late Night", "Holiday", "Holiday Night", "Total"]
     for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
 
     for row, emp in enumerate(employees, 2):
-              allow = emp['allowances']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=emp['hourly_rate'])
-              ws.cell(row=row, column=3, value=allow['regular_overtime'])
-              ws.cell(row=row, column=4, value=allow['late_night'])
-              ws.cell(row=row, column=5, value=allow['holiday_work'])
-              ws.cell(row=row, column=6, value=allow['holiday_late_night'])
-              ws.cell(row=row, column=7, value=allow['total'])
+        allow = emp['allowances']
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=emp['hourly_rate'])
+        ws.cell(row=row, column=3, value=allow['regular_overtime'])
+        ws.cell(row=row, column=4, value=allow['late_night'])
+        ws.cell(row=row, column=5, value=allow['holiday_work'])
+        ws.cell(row=row, column=6, value=allow['holiday_late_night'])
+        ws.cell(row=row, column=7, value=allow['total'])
 
     return ws
 
 
 def create_deduction_sheet(wb, employees):
-      """Create deduction calculation sheet"""
-      ws = wb.create_sheet("Deductions")
+    """Create deduction calculation sheet"""
+    ws = wb.create_sheet("Deductions")
 
     headers = ["ID", "Absence", "Tardiness", "Total Deduct", "Social Ins", "Income Tax", "Statutory Total"]
     for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
 
     for row, emp in enumerate(employees, 2):
-              ded = emp['deductions_from_pay']
-              stat = emp['statutory_deductions']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=ded['absence'])
-              ws.cell(row=row, column=3, value=ded['tardiness'])
-              ws.cell(row=row, column=4, value=ded['total'])
-              ws.cell(row=row, column=5, value=stat['social_insurance'])
-              ws.cell(row=row, column=6, value=stat['income_tax'])
-              ws.cell(row=row, column=7, value=stat['total'])
+        ded = emp['deductions_from_pay']
+        stat = emp['statutory_deductions']
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=ded['absence'])
+        ws.cell(row=row, column=3, value=ded['tardiness'])
+        ws.cell(row=row, column=4, value=ded['total'])
+        ws.cell(row=row, column=5, value=stat['social_insurance'])
+        ws.cell(row=row, column=6, value=stat['income_tax'])
+        ws.cell(row=row, column=7, value=stat['total'])
 
     return ws
 
 
 def create_payslip_sheet(wb, employees):
-      """Create payslip summary sheet"""
-      ws = wb.create_sheet("Payslip")
+    """Create payslip summary sheet"""
+    ws = wb.create_sheet("Payslip")
 
     headers = ["ID", "Name", "Base Salary", "Allowances", "Deductions", "Gross Pay", "Statutory", "Net Pay"]
     for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
 
     for row, emp in enumerate(employees, 2):
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=emp['employee_name'])
-              ws.cell(row=row, column=3, value=emp['base_salary'])
-              ws.cell(row=row, column=4, value=emp['allowances']['total'])
-              ws.cell(row=row, column=5, value=emp['deductions_from_pay']['total'])
-              ws.cell(row=row, column=6, value=emp['gross_pay'])
-              ws.cell(row=row, column=7, value=emp['statutory_deductions']['total'])
-              ws.cell(row=row, column=8, value=emp['net_pay'])
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=emp['employee_name'])
+        ws.cell(row=row, column=3, value=emp['base_salary'])
+        ws.cell(row=row, column=4, value=emp['allowances']['total'])
+        ws.cell(row=row, column=5, value=emp['deductions_from_pay']['total'])
+        ws.cell(row=row, column=6, value=emp['gross_pay'])
+        ws.cell(row=row, column=7, value=emp['statutory_deductions']['total'])
+        ws.cell(row=row, column=8, value=emp['net_pay'])
 
     # Totals
     total_row = len(employees) + 2
@@ -150,150 +151,100 @@ def create_payslip_sheet(wb, employees):
 
 
 def create_verification_sheet(wb, employees):
-      """Create verification sheet"""
-      ws = wb.create_sheet("Verification")
+    """Create verification sheet"""
+    ws = wb.create_sheet("Verification")
 
     headers = ["ID", "Name", "Expected Net", "Calculated Net", "Difference", "Status"]
     for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = Font(bold=True)
 
     for row, emp in enumerate(employees, 2):
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=emp['employee_name'])
-              ws.cell(row=row, column=3, value=emp['net_pay'])
-              ws.cell(row=row, column=4, value=f"=Payslip!H{row}")
-              ws.cell(row=row, column=5, value=f"=C{row}-D{row}")
-              ws.cell(row=row, column=6, value=f'=IF(E{row}=0,"OK","ERROR")')
+        ws.cell(row=row, column=1, value=emp['employee_id'])
+        ws.cell(row=row, column=2, value=emp['employee_name'])
+        ws.cell(row=row, column=3, value=emp['net_pay'])
+        ws.cell(row=row, column=4, value=f"=Payslip!H{row}")
+        ws.cell(row=row, column=5, value=f"=C{row}-D{row}")
+        ws.cell(row=row, column=6, value=f'=IF(E{row}=0,"OK","ERROR")')
 
     return ws
 
 
-def generate_excel(input_file, output_file):
-      """Generate Excel file from JSON data"""
-      with open(input_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-      employees = data['results']
-      grade_table = data['grade_table']
+def load_master_from_store(employees, store):
+    """Read master and attendance data for each result from an employee store"""
+    master = []
+    for emp in employees:
+        found = store.get(emp['employee_id'])
+        if found is None:
+            raise ValueError(f"Employee not found in employee store: {emp['employee_id']}")
+        employee, attendance = found
+        master.append({
+            'employee_id': employee['id'],
+            'employee_name': employee['name'],
+            'department': employee['department'],
+            'grade': employee['grade'],
+            'base_salary': employee['base_salary'],
+            'commute_allowance': employee['commute_allowance'],
+            'dependents': employee.get('dependents', 0),
+            'attendance': attendance
+        })
+    return master
+
+
+def generate_excel(input_file, output_file, employee_store=None):
+    """
+    Generate Excel file from JSON data
+    With employee_store, the Master and Attendance sheets are read from the store.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    employees = data['results']
+    grade_table = data['grade_table']
 
     wb = Workbook()
     wb.remove(wb.active)
 
-    create_master_sheet(wb, employees, grade_table)#!/usr/bin/env python3
-"""
-Excel generate script for payroll results.
-Creates a spreadsheet with cross-sheet references.
-"""
-
-import json
-import sys
-
-try:
-      from openpyxl import Workbook
-      from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-      from openpyxl.utils import get_column_letter
-except ImportError:
-      print("Error: openpyxl is not installed.")
-      print("Install with: pip install openpyxl")
-      sys.exit(1)
-
-
-def create_master_sheet(wb, employees, grade_table):
-      """Create master data sheet"""
-      ws = wb.create_sheet("Master")
-
-    # Header
-      headers = ["ID", "Name", "Department", "Grade", "Base Salary", "Commute", "Dependents"]
-      for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.font = Font(bold=True)
-
-      # Employee data
-      for row, emp in enumerate(employees, 2):
-                ws.cell(row=row, column=1, value=emp['employee_id'])
-                ws.cell(row=row, column=2, value=emp['employee_name'])
-                ws.cell(row=row, column=3, value=emp['department'])
-                ws.cell(row=row, column=4, value=emp['grade'])
-                ws.cell(row=row, column=5, value=emp['base_salary'])
-                ws.cell(row=row, column=6, value=emp['commute_allowance'])
-                ws.cell(row=row, column=7, value=emp['dependents'])
-
-    # Grade table
-    ws.cell(row=6, column=1, value="Grade Table")
-    ws.cell(row=7, column=1, value="Grade")
-    ws.cell(row=7, column=2, value="Insurance Rate")
-    ws.cell(row=7, column=3, value="Base Deduction")
-
-    row = 8
-    for grade, info in grade_table.items():
-              ws.cell(row=row, column=1, value=grade)
-              ws.cell(row=row, column=2, value=info['insurance_rate'])
-              ws.cell(row=row, column=3, value=info['base_deduction'])
-              row += 1
-
-    return ws
-
-
-def create_attendance_sheet(wb, employees):
-      """Create attendance sheet"""
-      ws = wb.create_sheet("Attendance")
-
-    headers = ["ID", "Regular OT", "Late Night OT", "Holiday", "Holiday Night", "Absence", "Tardiness"]
-    for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
-
-    for row, emp in enumerate(employees, 2):
-              att = emp['attendance']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=att['regular_overtime_hours'])
-              ws.cell(row=row, column=3, value=att['late_night_overtime_hours'])
-              ws.cell(row=row, column=4, value=att['holiday_work_hours'])
-              ws.cell(row=row, column=5, value=att['holiday_late_night_hours'])
-              ws.cell(row=row, column=6, value=att['absence_days'])
-              ws.cell(row=row, column=7, value=att['tardiness_count'])
-
-    return ws
-
-
-def create_allowance_sheet(wb, employees):
-      """Create allowance calculation sheet"""
-      ws = wb.create_sheet("Allowances")
-
-    headers = ["ID", "Hourly Rate", "Regular OT", "Late Night", "Holiday", "Holiday Night", "Total"]
-    for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
-
-    for row, emp in enumerate(employees, 2):
-              allow = emp['allowances']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=emp['hourly_rate'])
-              ws.cell(row=row, column=3, value=allow['regular_overtime'])
-              ws.cell(row=row, column=4, value=allow['late_night'])
-              ws.cell(row=row, column=5, value=allow['holiday_work'])
-              ws.cell(row=row, column=6, value=allow['holiday_late_night'])
-              ws.cell(row=row, column=7, value=allow['total'])
-
-    return ws
-
-
-def create_deduction_sheet(wb, employees):
-      """Create deduction calculation sheet"""
-      ws = wb.create_sheet("Deductions")
-
-    headers = ["ID", "Absence", "Tardiness", "Total Deduct", "Social Ins", "Income Tax", "Statutory Total"]
-    for col, header in enumerate(headers, 1):
-              cell = ws.cell(row=1, column=col, value=header)
-              cell.font = Font(bold=True)
-
-    for row, emp in enumerate(employees, 2):
-              ded = emp['deductions_from_pay']
-              stat = emp['statutory_deductions']
-              ws.cell(row=row, column=1, value=emp['employee_id'])
-              ws.cell(row=row, column=2, value=ded['absence'])
-              ws.cell(row=row, column=3, value=ded['tardiness'])
-              ws.cell(row=row, column=4, value=ded['total'])
-              ws.cell(row=row, column=5, value=stat['social_insurance'])
-              ws.cell(row=row, column=6,
+    if employee_store:
+        from employee_store import EmployeeStore
+        with EmployeeStore(employee_store) as store:
+            master = load_master_from_store(employees, store)
+    else:
+        master = employees
+
+    create_master_sheet(wb, master, grade_table)
+    create_attendance_sheet(wb, master)
+    create_allowance_sheet(wb, employees)
+    create_deduction_sheet(wb, employees)
+    create_payslip_sheet(wb, employees)
+    create_verification_sheet(wb, employees)
+
+    wb.save(output_file)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python generate_excel.py <input.json> <output.xlsx> [employee_store]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+    employee_store = sys.argv[3] if len(sys.argv) > 3 else None
+
+    try:
+        generate_excel(input_file, output_file, employee_store)
+        print(f"Excel file saved: {output_file}")
+
+    except FileNotFoundError as e:
+        print(f"Error: File not found: {e}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: Failed to parse JSON: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
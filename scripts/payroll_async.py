@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+非同期給与計算API
+asyncioアプリケーションからイベントループを止めずに給与計算を実行します。
+計算はチャンク単位でエグゼキュータに投入し、結果を非同期イテレータで返します。
+"""
+
+import asyncio
+import atexit
+import json
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Any, AsyncIterator, Optional
+
+from calculate_payroll import calculate_employee_payroll
+
+# 定数
+DEFAULT_CHUNK_SIZE = 500       # 1チャンクあたりの従業員数
+DEFAULT_MAX_CONCURRENCY = 2    # 同時に実行するチャンク数の上限
+
+_shared_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_shared_executor() -> ProcessPoolExecutor:
+    """呼び出し間で共有するProcessPoolExecutor（初回に作成し、終了時に停止）"""
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = ProcessPoolExecutor()
+        atexit.register(_shutdown_shared_executor)
+    return _shared_executor
+
+
+def _shutdown_shared_executor() -> None:
+    global _shared_executor
+    if _shared_executor is not None:
+        _shared_executor.shutdown(wait=True, cancel_futures=True)
+        _shared_executor = None
+
+
+def _calculate_chunk(employees: List[Dict], attendances: List[Dict], grade_table: Dict) -> List[Dict]:
+    """1チャンク分の給与を計算（エグゼキュータ上で実行）"""
+    return [
+        calculate_employee_payroll(emp, attendance, grade_table)
+        for emp, attendance in zip(employees, attendances)
+    ]
+
+
+async def iter_payroll_async(input_data: Dict,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                             executor: Optional[Executor] = None,
+                             private_pool: bool = False) -> AsyncIterator[Dict]:
+    """
+    従業員ごとの計算結果を入力順に返す非同期イテレータ
+    - 実行中・未取得のチャンクはmax_concurrency個まで（呼び出し側が取得するまで次を投入しない）
+    - 計算はGILを保持するため、スレッドではなくプロセスで実行する必要がある
+      executorがNoneの場合はモジュールで共有するProcessPoolExecutorを使う
+      （初回の呼び出しで作成し、インタプリタ終了時に停止する）
+    - private_pool=Trueの場合はこの呼び出し専用にmax_concurrency個のワーカーを持つ
+      ProcessPoolExecutorを作成し、終了時に停止する
+    - 反復を途中で止める・キャンセルすると未開始のチャンクは取り消される
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be positive")
+
+    loop = asyncio.get_running_loop()
+    employees = input_data['employees']
+    grade_table = input_data['grade_table']
+    attendance_map = {a['employee_id']: a for a in input_data['attendance']}
+
+    owned_executor = None
+    if private_pool:
+        if executor is not None:
+            raise ValueError("executor and private_pool cannot be used together")
+        executor = owned_executor = ProcessPoolExecutor(max_workers=max_concurrency)
+    elif executor is None:
+        executor = _get_shared_executor()
+
+    pending = deque()
+
+    def submit(chunk_start: int) -> asyncio.Future:
+        chunk = employees[chunk_start:chunk_start + chunk_size]
+        attendances = [attendance_map.get(emp['id'], {}) for emp in chunk]
+        return loop.run_in_executor(executor, _calculate_chunk, chunk, attendances, grade_table)
+
+    try:
+        for chunk_start in range(0, len(employees), chunk_size):
+            pending.append(submit(chunk_start))
+            if len(pending) >= max_concurrency:
+                for result in await pending.popleft():
+                    yield result
+
+        while pending:
+            for result in await pending.popleft():
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned_executor is not None:
+            owned_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def process_payroll_async(input_data: Dict,
+                                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                                executor: Optional[Executor] = None,
+                                private_pool: bool = False) -> Dict:
+    """全従業員の給与計算を非同期に処理（process_payrollと同じ出力形式）"""
+    results = []
+    summary = {
+        'total_gross_pay': 0,
+        'total_deductions': 0,
+        'total_net_pay': 0,
+        'employee_count': len(input_data['employees'])
+    }
+
+    async for result in iter_payroll_async(input_data, chunk_size, max_concurrency,
+                                           executor, private_pool):
+        results.append(result)
+        summary['total_gross_pay'] += result['gross_pay']
+        summary['total_deductions'] += result['statutory_deductions']['total']
+        summary['total_net_pay'] += result['net_pay']
+
+    return {
+        'results': results,
+        'summary': summary,
+        'grade_table': input_data['grade_table']
+    }
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python payroll_async.py <input.json> <output.json> [max_concurrency]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+
+    try:
+        max_concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_MAX_CONCURRENCY
+
+        with open(input_file, 'r', encoding='utf-8') as f:
+            input_data = json.load(f)
+
+        output_data = asyncio.run(process_payroll_async(input_data, max_concurrency=max_concurrency))
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+        summary = output_data['summary']
+        print("=" * 60)
+        print("給与計算完了（非同期）")
+        print("=" * 60)
+        print(f"従業員数: {summary['employee_count']}")
+        print(f"総支給額合計: ¥{summary['total_gross_pay']:,}")
+        print(f"控除合計: ¥{summary['total_deductions']:,}")
+        print(f"差引支給額合計: ¥{summary['total_net_pay']:,}")
+        print(f"\n結果を {output_file} に保存しました。")
+
+    except FileNotFoundError:
+        print(f"Error: ファイルが見つかりません: {input_file}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: JSONの解析に失敗しました: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
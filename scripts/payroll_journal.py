@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+チェックポイント付き給与計算スクリプト
+計算済みの結果をチャンク単位で追記専用ジャーナルに書き込み、
+中断後は最後にコミットされた従業員から計算を再開します。
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+
+from calculate_payroll import calculate_employee_payroll
+
+# 定数
+DEFAULT_CHUNK_SIZE = 1000     # 1チャンクあたりの従業員数
+DEFAULT_FSYNC_INTERVAL = 10   # fsyncするまでのチャンク数
+JOURNAL_VERSION = 2
+
+# ジャーナル形式
+# 1行目: JSONヘッダ
+# 以降: チャンク（開始位置, 件数, CRC32）+ 従業員ごとの計算値（COMPUTED_FIELDS順の64bit整数）
+# 入力から復元できる項目（氏名・勤怠など）は記録しません。
+COMPUTED_FIELDS = (
+    ('hourly_rate',),
+    ('allowances', 'regular_overtime'),
+    ('allowances', 'late_night'),
+    ('allowances', 'holiday_work'),
+    ('allowances', 'holiday_late_night'),
+    ('allowances', 'total'),
+    ('deductions_from_pay', 'absence'),
+    ('deductions_from_pay', 'tardiness'),
+    ('deductions_from_pay', 'total'),
+    ('gross_pay',),
+    ('statutory_deductions', 'social_insurance'),
+    ('statutory_deductions', 'income_tax'),
+    ('statutory_deductions', 'total'),
+    ('net_pay',)
+)
+RESULT = struct.Struct(f'<{len(COMPUTED_FIELDS)}q')
+CHUNK_HEADER = struct.Struct('<QII')
+
+GROSS_PAY = COMPUTED_FIELDS.index(('gross_pay',))
+STATUTORY_TOTAL = COMPUTED_FIELDS.index(('statutory_deductions', 'total'))
+NET_PAY = COMPUTED_FIELDS.index(('net_pay',))
+
+
+def input_hash(input_data: Dict) -> str:
+    """
+    ジャーナルと入力データの対応を確認するためのハッシュ
+    入力ファイルのバイト列がある場合はそちらのハッシュ（hash_bytes）を使う方が高速です。
+    """
+    sections = [input_data['employees'], input_data['attendance'], input_data['grade_table']]
+    return hash_bytes(json.dumps(sections, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _pack_result(result: Dict) -> bytes:
+    values = []
+    for path in COMPUTED_FIELDS:
+        value = result
+        for key in path:
+            value = value[key]
+        if type(value) is not int:
+            raise ValueError(f"円単位の整数ではない金額はジャーナルに記録できません: "
+                             f"{result['employee_id']} {'.'.join(path)}={value!r}")
+        values.append(value)
+    return RESULT.pack(*values)
+
+
+def _rebuild_result(employee: Dict, attendance: Dict, values: Tuple[int, ...]) -> Dict:
+    """入力データとジャーナルの計算値からcalculate_employee_payrollと同じ結果を復元"""
+    (hourly_rate, regular_overtime, late_night, holiday_work, holiday_late_night,
+     allowances_total, absence, tardiness, deductions_total, gross_pay,
+     social_insurance, income_tax, statutory_total, net_pay) = values
+
+    return {
+        'employee_id': employee['id'],
+        'employee_name': employee['name'],
+        'department': employee['department'],
+        'grade': employee['grade'],
+        'base_salary': employee['base_salary'],
+        'commute_allowance': employee['commute_allowance'],
+        'dependents': employee.get('dependents', 0),
+        'hourly_rate': hourly_rate,
+        'attendance': {
+            'regular_overtime_hours': attendance.get('regular_overtime_hours', 0),
+            'late_night_overtime_hours': attendance.get('late_night_overtime_hours', 0),
+            'holiday_work_hours': attendance.get('holiday_work_hours', 0),
+            'holiday_late_night_hours': attendance.get('holiday_late_night_hours', 0),
+            'absence_days': attendance.get('absence_days', 0),
+            'tardiness_count': attendance.get('tardiness_count', 0)
+        },
+        'allowances': {
+            'regular_overtime': regular_overtime,
+            'late_night': late_night,
+            'holiday_work': holiday_work,
+            'holiday_late_night': holiday_late_night,
+            'total': allowances_total
+        },
+        'deductions_from_pay': {
+            'absence': absence,
+            'tardiness': tardiness,
+            'total': deductions_total
+        },
+        'gross_pay': gross_pay,
+        'statutory_deductions': {
+            'social_insurance': social_insurance,
+            'income_tax': income_tax,
+            'total': statutory_total
+        },
+        'net_pay': net_pay
+    }
+
+
+def read_journal(journal_path: str) -> Tuple[Optional[Dict], List[Tuple[int, ...]], int]:
+    """
+    ジャーナルを読み込む
+    戻り値: (ヘッダ, 従業員ごとの計算値, 有効なバイト長)
+    空のファイルは (None, [], 0) を返します。内容があるのにヘッダが読めない場合は
+    ジャーナルではないとみなしてValueErrorを送出します。
+    末尾の書きかけチャンク（クラッシュ時）は無視し、有効なバイト長に含めません。
+    """
+    values = []
+
+    with open(journal_path, 'rb') as f:
+        first_line = f.readline()
+        if not first_line:
+            return None, [], 0
+
+        header = None
+        if first_line.endswith(b'\n'):
+            try:
+                header = json.loads(first_line.decode('utf-8'))
+            except ValueError:
+                header = None
+        if not isinstance(header, dict) or header.get('type') != 'header':
+            raise ValueError(f"ジャーナルではないファイルです: {journal_path}")
+        if header.get('version') != JOURNAL_VERSION:
+            raise ValueError(f"ジャーナルのバージョンが異なります: {journal_path}")
+
+        valid_length = len(first_line)
+        while True:
+            chunk_header = f.read(CHUNK_HEADER.size)
+            if len(chunk_header) < CHUNK_HEADER.size:
+                break
+            start, count, crc = CHUNK_HEADER.unpack(chunk_header)
+            payload = f.read(count * RESULT.size)
+            if len(payload) < count * RESULT.size or zlib.crc32(payload) != crc:
+                break
+            if start != len(values):
+                raise ValueError(f"ジャーナルが不正です: {journal_path}")
+            values.extend(RESULT.iter_unpack(payload))
+            valid_length += len(chunk_header) + len(payload)
+
+    return header, values, valid_length
+
+
+def process_payroll_checkpointed(input_data: Dict, journal_path: str,
+                                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                 fsync_interval: int = DEFAULT_FSYNC_INTERVAL,
+                                 input_digest: Optional[str] = None) -> Dict:
+    """
+    ジャーナルに記録しながら全従業員の給与計算を処理
+    - 既存のジャーナルがあれば、最後にコミットされた従業員の次から再開
+    - 再開時の結果とsummaryはジャーナルの計算値と入力データから復元
+    - fsyncはfsync_intervalチャンクごとにまとめて実行
+    - input_digestが入力データと異なるジャーナルからは再開しない
+      （省略時はinput_hashで計算。入力ファイルがあればhash_bytesの値を渡す）
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if fsync_interval <= 0:
+        raise ValueError("fsync_interval must be positive")
+
+    employees = input_data['employees']
+    grade_table = input_data['grade_table']
+    attendance_map = {a['employee_id']: a for a in input_data['attendance']}
+    if input_digest is None:
+        input_digest = input_hash(input_data)
+
+    header, values, valid_length = (None, [], 0)
+    if os.path.exists(journal_path):
+        header, values, valid_length = read_journal(journal_path)
+        if header is not None and header.get('input_hash') != input_digest:
+            raise ValueError(f"ジャーナルが入力データと一致しません: {journal_path}")
+    if len(values) > len(employees):
+        raise ValueError(f"ジャーナルが入力データと一致しません: {journal_path}")
+
+    results = [
+        _rebuild_result(emp, attendance_map.get(emp['id'], {}), emp_values)
+        for emp, emp_values in zip(employees, values)
+    ]
+    summary = {
+        'total_gross_pay': sum(v[GROSS_PAY] for v in values),
+        'total_deductions': sum(v[STATUTORY_TOTAL] for v in values),
+        'total_net_pay': sum(v[NET_PAY] for v in values),
+        'employee_count': len(employees)
+    }
+
+    start_index = len(values)
+    if start_index >= len(employees) and header is not None:
+        return {
+            'results': results,
+            'summary': summary,
+            'grade_table': grade_table
+        }
+
+    with open(journal_path, 'ab') as journal:
+        # 書きかけの末尾チャンクを切り捨てる（ヘッダを確認済みか空のファイルのみ）
+        journal.truncate(valid_length)
+
+        if header is None:
+            header = {
+                'type': 'header',
+                'version': JOURNAL_VERSION,
+                'input_hash': input_digest
+            }
+            journal.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+
+        pending_chunks = 0
+        for chunk_start in range(start_index, len(employees), chunk_size):
+            packed = []
+            for emp in employees[chunk_start:chunk_start + chunk_size]:
+                attendance = attendance_map.get(emp['id'], {})
+                result = calculate_employee_payroll(emp, attendance, grade_table)
+                results.append(result)
+                packed.append(_pack_result(result))
+                summary['total_gross_pay'] += result['gross_pay']
+                summary['total_deductions'] += result['statutory_deductions']['total']
+                summary['total_net_pay'] += result['net_pay']
+
+            payload = b''.join(packed)
+            journal.write(CHUNK_HEADER.pack(chunk_start, len(packed), zlib.crc32(payload)) + payload)
+
+            pending_chunks += 1
+            if pending_chunks >= fsync_interval:
+                journal.flush()
+                os.fsync(journal.fileno())
+                pending_chunks = 0
+
+        journal.flush()
+        os.fsync(journal.fileno())
+
+    return {
+        'results': results,
+        'summary': summary,
+        'grade_table': grade_table
+    }
+
+
+def main():
+    if len(sys.argv) < 4:
+        print("Usage: python payroll_journal.py <input.json> <output.json> <journal> [chunk_size]")
+        sys.exit(1)
+
+    input_file = sys.argv[1]
+    output_file = sys.argv[2]
+    journal_file = sys.argv[3]
+
+    try:
+        chunk_size = int(sys.argv[4]) if len(sys.argv) > 4 else DEFAULT_CHUNK_SIZE
+
+        with open(input_file, 'rb') as f:
+            raw = f.read()
+        input_data = json.loads(raw.decode('utf-8'))
+
+        output_data = process_payroll_checkpointed(input_data, journal_file, chunk_size,
+                                                   input_digest=hash_bytes(raw))
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+        summary = output_data['summary']
+        print("=" * 60)
+        print("給与計算完了（ジャーナル付き）")
+        print("=" * 60)
+        print(f"従業員数: {summary['employee_count']}")
+        print(f"総支給額合計: ¥{summary['total_gross_pay']:,}")
+        print(f"控除合計: ¥{summary['total_deductions']:,}")
+        print(f"差引支給額合計: ¥{summary['total_net_pay']:,}")
+        print(f"\n結果を {output_file} に保存しました。")
+        print(f"ジャーナル: {journal_file}")
+
+    except FileNotFoundError:
+        print(f"Error: ファイルが見つかりません: {input_file}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: JSONの解析に失敗しました: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+遡及差額計算スクリプト
+過去の給与計算結果と発効月付きの従業員変更から、
+変更の影響を受ける従業員・月だけを再計算し、支給済み額との差額を出力します。
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from calculate_payroll import calculate_employee_payroll
+
+# 遡及変更できる項目
+RETRO_FIELDS = ('base_salary', 'commute_allowance', 'dependents', 'grade')
+
+# 月次結果インデックス（YYYY-MM.idx）の形式
+# ヘッダ: 元ファイルのサイズ, 元ファイルの更新時刻, grade_tableの位置, grade_tableの長さ
+# エントリ: employee_id, 計算結果の位置, 計算結果の長さ（employee_id順）
+INDEX_HEADER = struct.Struct('<QqQI')
+INDEX_ENTRY = struct.Struct('<16sQI')
+INDEX_SUFFIX = '.idx'
+
+
+def _key(employee_id: str) -> bytes:
+    encoded = employee_id.encode('utf-8')
+    if len(encoded) > 16:
+        raise ValueError(f"employee_id is too long ({len(encoded)} > 16 bytes): {employee_id}")
+    return encoded.ljust(16, b'\x00')
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in ' \t\r\n':
+        pos += 1
+    return pos
+
+
+def _expect(text: str, pos: int, char: str, path: str) -> int:
+    if pos >= len(text) or text[pos] != char:
+        raise ValueError(f"計算結果の形式が不正です: {path}")
+    return pos + 1
+
+
+def build_month_index(json_path: str) -> None:
+    """
+    月次の計算結果（calculate_payroll.pyの出力）のインデックスを作成
+    各従業員の計算結果とgrade_tableのバイト位置をemployee_id順に記録します。
+    月ごとに一度だけ全体を読み込み、以降の参照は必要なレコードだけを読みます。
+    """
+    stat = os.stat(json_path)
+    with open(json_path, 'rb') as f:
+        text = f.read().decode('utf-8')
+
+    decoder = json.JSONDecoder()
+    entries = []
+    grade_table_span = (0, 0)
+
+    # 文字位置からバイト位置への変換（位置は単調増加で呼ばれる）
+    converted = [0, 0]
+
+    def byte_offset(char_pos: int) -> int:
+        converted[1] += len(text[converted[0]:char_pos].encode('utf-8'))
+        converted[0] = char_pos
+        return converted[1]
+
+    pos = _expect(text, _skip_whitespace(text, 0), '{', json_path)
+    while True:
+        pos = _skip_whitespace(text, pos)
+        if pos < len(text) and text[pos] == '}':
+            break
+        key, pos = decoder.raw_decode(text, pos)
+        pos = _expect(text, _skip_whitespace(text, pos), ':', json_path)
+        pos = _skip_whitespace(text, pos)
+
+        if key == 'results':
+            pos = _skip_whitespace(text, _expect(text, pos, '[', json_path))
+            while pos < len(text) and text[pos] != ']':
+                result, end = decoder.raw_decode(text, pos)
+                start = byte_offset(pos)
+                entries.append((_key(result['employee_id']), start, byte_offset(end) - start))
+                pos = _skip_whitespace(text, end)
+                if pos < len(text) and text[pos] == ',':
+                    pos = _skip_whitespace(text, pos + 1)
+            pos = _expect(text, pos, ']', json_path)
+        else:
+            _, end = decoder.raw_decode(text, pos)
+            if key == 'grade_table':
+                start = byte_offset(pos)
+                grade_table_span = (start, byte_offset(end) - start)
+            pos = end
+
+        pos = _skip_whitespace(text, pos)
+        if pos < len(text) and text[pos] == ',':
+            pos += 1
+
+    entries.sort()
+    for prev, cur in zip(entries, entries[1:]):
+        if prev[0] == cur[0]:
+            emp_id = cur[0].rstrip(b'\x00').decode('utf-8')
+            raise ValueError(f"Duplicate employee_id in {json_path}: {emp_id}")
+
+    index_path = os.path.splitext(json_path)[0] + INDEX_SUFFIX
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(INDEX_HEADER.pack(stat.st_size, stat.st_mtime_ns, *grade_table_span))
+        for entry in entries:
+            f.write(INDEX_ENTRY.pack(*entry))
+    os.replace(tmp_path, index_path)
+
+
+class _MonthFile:
+    """インデックス経由で1か月分の計算結果を参照"""
+
+    def __init__(self, json_path: str):
+        index_path = os.path.splitext(json_path)[0] + INDEX_SUFFIX
+        if not self._is_fresh(json_path, index_path):
+            build_month_index(json_path)
+
+        with open(index_path, 'rb') as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = (len(self._index) - INDEX_HEADER.size) // INDEX_ENTRY.size
+        self._source = open(json_path, 'rb')
+
+    @staticmethod
+    def _is_fresh(json_path: str, index_path: str) -> bool:
+        if not os.path.exists(index_path):
+            return False
+        stat = os.stat(json_path)
+        with open(index_path, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+        if len(header) < INDEX_HEADER.size:
+            return False
+        size, mtime_ns, _, _ = INDEX_HEADER.unpack(header)
+        return size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+    def close(self) -> None:
+        self._index.close()
+        self._source.close()
+
+    def _read(self, offset: int, length: int) -> Any:
+        self._source.seek(offset)
+        return json.loads(self._source.read(length).decode('utf-8'))
+
+    def grade_table(self) -> Dict:
+        _, _, offset, length = INDEX_HEADER.unpack_from(self._index, 0)
+        return self._read(offset, length)
+
+    def get(self, employee_id: str) -> Optional[Dict]:
+        """インデックスを二分探索して1人分の計算結果を読み込む"""
+        key = _key(employee_id)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, offset, length = INDEX_ENTRY.unpack_from(
+                self._index, INDEX_HEADER.size + mid * INDEX_ENTRY.size)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                return self._read(offset, length)
+        return None
+
+
+class MonthlyHistory:
+    """
+    history_dir内の YYYY-MM.json（calculate_payroll.pyの出力）を月次履歴として参照
+    インデックス（YYYY-MM.idx）は月次結果の出力時に作成しておきます
+    （calculate_payroll.py --index または retro_pay.py index）。
+    ない・古い場合は初回参照時に作成します。
+    """
+
+    def __init__(self, history_dir: str):
+        self.history_dir = history_dir
+        self._files = {}
+        self._months = sorted(
+            os.path.splitext(name)[0] for name in os.listdir(history_dir)
+            if name.endswith('.json')
+        )
+
+    def close(self) -> None:
+        for month_file in self._files.values():
+            month_file.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def months(self) -> List[str]:
+        return list(self._months)
+
+    def _month(self, month: str) -> _MonthFile:
+        if month not in self._files:
+            self._files[month] = _MonthFile(os.path.join(self.history_dir, month + '.json'))
+        return self._files[month]
+
+    def grade_table(self, month: str) -> Dict:
+        return self._month(month).grade_table()
+
+    def get(self, month: str, employee_id: str) -> Optional[Dict]:
+        return self._month(month).get(employee_id)
+
+
+def _employee_from_result(result: Dict) -> Dict:
+    """保存済みの計算結果から従業員データを復元"""
+    return {
+        'id': result['employee_id'],
+        'name': result['employee_name'],
+        'department': result['department'],
+        'grade': result['grade'],
+        'base_salary': result['base_salary'],
+        'commute_allowance': result['commute_allowance'],
+        'dependents': result['dependents']
+    }
+
+
+def _group_changes(changes: List[Dict]) -> Dict[str, List[Dict]]:
+    """変更を従業員ごとに発効月順でまとめる"""
+    grouped = {}
+    for change in changes:
+        unknown = set(change['changes']) - set(RETRO_FIELDS)
+        if unknown:
+            raise ValueError(f"遡及変更できない項目です: {', '.join(sorted(unknown))}")
+        end_month = change.get('end_month')
+        if end_month is not None and end_month < change['effective_month']:
+            raise ValueError(f"end_monthがeffective_monthより前です: {change['employee_id']}")
+        grouped.setdefault(change['employee_id'], []).append(change)
+
+    for emp_changes in grouped.values():
+        emp_changes.sort(key=lambda c: c['effective_month'])
+    return grouped
+
+
+def _apply_changes(employee: Dict, emp_changes: List[Dict], month: str,
+                   baselines: Dict[Tuple[int, str], Any]) -> Dict:
+    """
+    対象月に有効な変更を適用した従業員データを返す
+    変更は発効月からend_month（指定時）まで、かつ支給済みの値が変更前の値
+    （発効後に最初に支給された値）のままの月にだけ適用します。
+    通常の昇給などで支給済みの値が変わった月以降は適用しません。
+    """
+    corrected = dict(employee)
+    for i, change in enumerate(emp_changes):
+        if change['effective_month'] > month:
+            break
+        end_month = change.get('end_month')
+        if end_month is not None and month > end_month:
+            continue
+        for field, value in change['changes'].items():
+            baseline = baselines.setdefault((i, field), employee[field])
+            if employee[field] == baseline:
+                corrected[field] = value
+    return corrected
+
+
+def calculate_retro_pay(history: MonthlyHistory, changes: List[Dict]) -> Dict:
+    """
+    遡及差額を計算
+    - history: 月次の計算結果（MonthlyHistory）
+    - changes: [{"employee_id", "effective_month", "end_month"(任意), "changes": {項目: 新しい値}}]
+    変更のある従業員の、発効月以降の月の計算結果だけをインデックス経由で読み込み、
+    保存済みの勤怠で再計算します。
+    - not_found: 対象月の計算結果を参照したが、どの月にも見つからなかった従業員
+    - no_affected_months: 発効月が保存済みの最終月より後で、参照する月がなかった従業員
+    """
+    grouped = _group_changes(changes)
+    deltas = []
+    summary = {
+        'gross_pay': 0,
+        'social_insurance': 0,
+        'income_tax': 0,
+        'net_pay': 0
+    }
+    looked_up = set()
+    found = set()
+    baselines = {emp_id: {} for emp_id in grouped}
+    since_month = min((c['effective_month'] for c in changes), default=None)
+
+    for month in history.months():
+        if since_month is None or month < since_month:
+            continue
+        affected = sorted(emp_id for emp_id, emp_changes in grouped.items()
+                          if emp_changes[0]['effective_month'] <= month)
+        grade_table = None
+
+        for emp_id in affected:
+            looked_up.add(emp_id)
+            paid = history.get(month, emp_id)
+            if paid is None:
+                continue
+            found.add(emp_id)
+
+            employee = _employee_from_result(paid)
+            corrected_employee = _apply_changes(employee, grouped[emp_id], month, baselines[emp_id])
+            if corrected_employee == employee:
+                continue
+
+            if grade_table is None:
+                grade_table = history.grade_table(month)
+            corrected = calculate_employee_payroll(corrected_employee, paid['attendance'], grade_table)
+
+            delta = {
+                'gross_pay': corrected['gross_pay'] - paid['gross_pay'],
+                'social_insurance': (corrected['statutory_deductions']['social_insurance'] -
+                                     paid['statutory_deductions']['social_insurance']),
+                'income_tax': (corrected['statutory_deductions']['income_tax'] -
+                               paid['statutory_deductions']['income_tax']),
+                'net_pay': corrected['net_pay'] - paid['net_pay']
+            }
+            for key, value in delta.items():
+                summary[key] += value
+
+            deltas.append({
+                'employee_id': emp_id,
+                'employee_name': paid['employee_name'],
+                'month': month,
+                **delta
+            })
+
+    deltas.sort(key=lambda d: (d['employee_id'], d['month']))
+
+    return {
+        'deltas': deltas,
+        'summary': summary,
+        'not_found': sorted(looked_up - found),
+        'no_affected_months': sorted(set(grouped) - looked_up)
+    }
+
+
+def main():
+    usage = ("Usage:\n"
+             "  python retro_pay.py <history_dir> <changes.json> <output.json>\n"
+             "  python retro_pay.py index <YYYY-MM.json> [...]")
+
+    if len(sys.argv) >= 3 and sys.argv[1] == 'index':
+        try:
+            for json_path in sys.argv[2:]:
+                build_month_index(json_path)
+                print(f"インデックスを作成しました: {os.path.splitext(json_path)[0] + INDEX_SUFFIX}")
+        except FileNotFoundError as e:
+            print(f"Error: ファイルが見つかりません: {e}")
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+
+    if len(sys.argv) < 4:
+        print(usage)
+        sys.exit(1)
+
+    history_dir = sys.argv[1]
+    changes_file = sys.argv[2]
+    output_file = sys.argv[3]
+
+    try:
+        with open(changes_file, 'r', encoding='utf-8') as f:
+            changes = json.load(f)['changes']
+
+        with MonthlyHistory(history_dir) as history:
+            output_data = calculate_retro_pay(history, changes)
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(output_data, f, ensure_ascii=False, indent=2)
+
+        summary = output_data['summary']
+        print("=" * 60)
+        print("遡及差額計算完了")
+        print("=" * 60)
+        for delta in output_data['deltas']:
+            print(f"{delta['employee_id']} {delta['employee_name']} {delta['month']}: "
+                  f"差引支給額 ¥{delta['net_pay']:+,}")
+        print("-" * 60)
+        print(f"総支給額差額: ¥{summary['gross_pay']:+,}")
+        print(f"社会保険料差額: ¥{summary['social_insurance']:+,}")
+        print(f"所得税差額: ¥{summary['income_tax']:+,}")
+        print(f"差引支給額差額: ¥{summary['net_pay']:+,}")
+        for emp_id in output_data['not_found']:
+            print(f"Warning: 計算結果が見つかりません: {emp_id}")
+        for emp_id in output_data['no_affected_months']:
+            print(f"Warning: 発効月以降の計算結果がまだありません: {emp_id}")
+        print(f"\n結果を {output_file} に保存しました。")
+
+    except FileNotFoundError as e:
+        print(f"Error: ファイルが見つかりません: {e}")
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Error: JSONの解析に失敗しました: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
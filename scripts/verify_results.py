@@ -2,101 +2,149 @@
 """
 Verification script for payroll calculation results.
 Compares calculated values against expected values.
+Optionally checks master data against an employee store (employee_store.py).
 """
 
 import json
 import sys
 
+MASTER_FIELDS = [
+    ('employee_name', 'name'),
+    ('department', 'department'),
+    ('grade', 'grade'),
+    ('base_salary', 'base_salary'),
+    ('commute_allowance', 'commute_allowance'),
+    ('dependents', 'dependents')
+]
 
-def verify_results(calculated, expected):
-      """Compare calculated vs expected results"""
-      results = []
-      total_errors = 0
+
+def verify_master(calc, store):
+    """Compare master data in a result against the employee store"""
+    found = store.get(calc['employee_id'])
+    if found is None:
+        return None
+
+    employee, attendance = found
+    errors = []
+    for result_field, store_field in MASTER_FIELDS:
+        stored = employee.get(store_field, 0)
+        if calc[result_field] != stored:
+            errors.append(f"Master {store_field}: calc={calc[result_field]}, store={stored}")
+
+    for field, value in calc['attendance'].items():
+        stored = attendance.get(field, 0)
+        if value != stored:
+            errors.append(f"Attendance {field}: calc={value}, store={stored}")
+
+    return errors
+
+
+def verify_results(calculated, expected, store=None):
+    """Compare calculated vs expected results"""
+    results = []
+    total_errors = 0
 
     calc_results = {r['employee_id']: r for r in calculated['results']}
     exp_results = {r['employee_id']: r for r in expected['results']}
 
     for emp_id in calc_results:
-              calc = calc_results[emp_id]
-              exp = exp_results.get(emp_id)
+        calc = calc_results[emp_id]
+        exp = exp_results.get(emp_id)
 
         if not exp:
-                      results.append({
-                                        'employee_id': emp_id,
-                                        'status': 'ERROR',
-                                        'message': 'Expected data not found'
-                      })
-                      total_errors += 1
-                      continue
+            results.append({
+                'employee_id': emp_id,
+                'status': 'ERROR',
+                'message': 'Expected data not found'
+            })
+            total_errors += 1
+            continue
 
         errors = []
 
+        if store is not None:
+            master_errors = verify_master(calc, store)
+            if master_errors is None:
+                results.append({
+                    'employee_id': emp_id,
+                    'status': 'ERROR',
+                    'message': 'Employee not found in employee store'
+                })
+                total_errors += 1
+                continue
+            errors.extend(master_errors)
+
         if calc['gross_pay'] != exp['gross_pay']:
-                      errors.append(f"Gross pay: calc={calc['gross_pay']:,}, exp={exp['gross_pay']:,}")
+            errors.append(f"Gross pay: calc={calc['gross_pay']:,}, exp={exp['gross_pay']:,}")
 
         if calc['net_pay'] != exp['net_pay']:
-                      errors.append(f"Net pay: calc={calc['net_pay']:,}, exp={exp['net_pay']:,}")
+            errors.append(f"Net pay: calc={calc['net_pay']:,}, exp={exp['net_pay']:,}")
 
         calc_ded = calc['statutory_deductions']['total']
         exp_ded = exp['statutory_deductions']['total']
         if calc_ded != exp_ded:
-                      errors.append(f"Deductions: calc={calc_ded:,}, exp={exp_ded:,}")
+            errors.append(f"Deductions: calc={calc_ded:,}, exp={exp_ded:,}")
 
         if errors:
-                      results.append({
-                                        'employee_id': emp_id,
-                                        'employee_name': calc['employee_name'],
-                                        'status': 'MISMATCH',
-                                        'errors': errors
-                      })
-                      total_errors += len(errors)
-else:
-              results.append({
-                                'employee_id': emp_id,
-                                'employee_name': calc['employee_name'],
-                                'status': 'OK',
-                                'gross_pay': calc['gross_pay'],
-                                'net_pay': calc['net_pay']
-              })
+            results.append({
+                'employee_id': emp_id,
+                'employee_name': calc['employee_name'],
+                'status': 'MISMATCH',
+                'errors': errors
+            })
+            total_errors += len(errors)
+        else:
+            results.append({
+                'employee_id': emp_id,
+                'employee_name': calc['employee_name'],
+                'status': 'OK',
+                'gross_pay': calc['gross_pay'],
+                'net_pay': calc['net_pay']
+            })
 
     return {
-              'verification_results': results,
-              'total_employees': len(calc_results),
-              'total_errors': total_errors,
-              'status': 'PASS' if total_errors == 0 else 'FAIL'
+        'verification_results': results,
+        'total_employees': len(calc_results),
+        'total_errors': total_errors,
+        'status': 'PASS' if total_errors == 0 else 'FAIL'
     }
 
 
 def main():
-      if len(sys.argv) < 3:
-                print("Usage: python verify_results.py <calculated.json> <expected.json>")
-                sys.exit(1)
+    if len(sys.argv) < 3:
+        print("Usage: python verify_results.py <calculated.json> <expected.json> [employee_store]")
+        sys.exit(1)
 
-      try:
-                with open(sys.argv[1], 'r', encoding='utf-8') as f:
-                              calculated = json.load(f)
+    try:
+        with open(sys.argv[1], 'r', encoding='utf-8') as f:
+            calculated = json.load(f)
 
-                with open(sys.argv[2], 'r', encoding='utf-8') as f:
-                              expected = json.load(f)
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            expected = json.load(f)
 
-                result = verify_results(calculated, expected)
+        if len(sys.argv) > 3:
+            from employee_store import EmployeeStore
+            with EmployeeStore(sys.argv[3]) as store:
+                result = verify_results(calculated, expected, store)
+        else:
+            result = verify_results(calculated, expected)
 
-          print("=" * 60)
+        print("=" * 60)
         print("Verification Report")
         print("=" * 60)
 
         for r in result['verification_results']:
-                      print(f"\\n[{r['employee_id']} {r.get('employee_name', '')}]")
-                      if r['status'] == 'OK':
-                                        print(f"  OK - Gross: {r['gross_pay']:,}, Net: {r['net_pay']:,}")
-elif r['status'] == 'MISMATCH':
+            print(f"\n[{r['employee_id']} {r.get('employee_name', '')}]")
+            if r['status'] == 'OK':
+                print(f"  OK - Gross: {r['gross_pay']:,}, Net: {r['net_pay']:,}")
+            elif r['status'] == 'MISMATCH':
                 print("  MISMATCH:")
                 for error in r['errors']:
-                                      print(f"    - {error}")
-else:
+                    print(f"    - {error}")
+            else:
                 print(f"  {r['message']}")
 
-        print("\\n" + "=" * 60)
+        print("\n" + "=" * 60)
         print(f"Result: {result['status']}")
         print(f"Employees: {result['total_employees']}")
         print(f"Errors: {result['total_errors']}")
@@ -104,13 +152,13 @@ else:
 
         sys.exit(0 if result['status'] == 'PASS' else 1)
 
-except FileNotFoundError as e:
+    except FileNotFoundError as e:
         print(f"Error: File not found: {e}")
         sys.exit(1)
-except Exception as e:
+    except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
 
 
 if __name__ == "__main__":
-      main()
+    main()
@@ -0,0 +1,47 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+GRADE_TABLE = {
+    "G1": {"insurance_rate": 0.145, "base_deduction": 5000},
+    "G2": {"insurance_rate": 0.145, "base_deduction": 5000},
+    "G3": {"insurance_rate": 0.150, "base_deduction": 8000},
+    "G4": {"insurance_rate": 0.150, "base_deduction": 8000},
+    "G5": {"insurance_rate": 0.155, "base_deduction": 10000}
+}
+
+
+def make_input(count, seed=0):
+    rng = random.Random(seed)
+    employees = []
+    attendance = []
+    for i in range(count):
+        emp_id = f"E{i:05d}"
+        employees.append({
+            'id': emp_id,
+            'name': f"従業員{i}",
+            'department': "営業部",
+            'grade': rng.choice(list(GRADE_TABLE)),
+            'base_salary': rng.randint(180000, 800000),
+            'commute_allowance': rng.randint(0, 30000),
+            'dependents': rng.randint(0, 4)
+        })
+        attendance.append({
+            'employee_id': emp_id,
+            'regular_overtime_hours': rng.choice([0, 10, 45, 45.5, 60, 72.25]),
+            'late_night_overtime_hours': rng.randint(0, 10),
+            'holiday_work_hours': rng.randint(0, 16),
+            'holiday_late_night_hours': rng.choice([0, 1.5, 4]),
+            'absence_days': rng.randint(0, 5),
+            'tardiness_count': rng.randint(0, 6)
+        })
+    return {'employees': employees, 'attendance': attendance, 'grade_table': GRADE_TABLE}
+
+
+@pytest.fixture
+def input_data():
+    return make_input(250)
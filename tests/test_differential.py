@@ -0,0 +1,51 @@
+import random
+
+from calculate_payroll import DEPENDENT_DEDUCTION, process_payroll
+from differential_test import (
+    BUILTIN_ENGINES,
+    GRADE_TABLE,
+    TAX_BRACKET_EDGES,
+    check_throughput,
+    generate_input,
+    run_differential,
+)
+
+
+def test_builtin_engines_match_reference():
+    result = run_differential(dict(BUILTIN_ENGINES), cases=600, batch_size=200, seed=1)
+    assert result['divergences'] == {}
+    assert set(result['throughput']) == {'reference', 'async', 'journal', 'store'}
+
+
+def test_generator_hits_tax_bracket_edges():
+    input_data = generate_input(random.Random(0), 2000)
+    output = process_payroll(input_data)
+
+    hits = set()
+    for r in output['results']:
+        base_deduction = GRADE_TABLE[r['grade']]['base_deduction']
+        taxable = (r['gross_pay'] - r['statutory_deductions']['social_insurance'] -
+                   base_deduction - DEPENDENT_DEDUCTION * r['dependents'])
+        hits.add(taxable)
+
+    for edge in TAX_BRACKET_EDGES:
+        assert {edge - 1, edge, edge + 1} <= hits
+
+
+def test_reports_first_divergent_field():
+    def off_by_one(input_data):
+        output = process_payroll(input_data)
+        output['results'][3]['statutory_deductions']['income_tax'] += 1
+        return output
+
+    result = run_differential({'bad': off_by_one}, cases=50, batch_size=50, seed=0)
+    divergence = result['divergences']['bad']
+    assert divergence['field'] == 'results[3].statutory_deductions.income_tax'
+    assert divergence['employee']['id'] == 'T000000003'
+
+
+def test_throughput_gate():
+    baseline = {'reference': 1000.0, 'async': 1000.0}
+    assert check_throughput({'reference': 950.0, 'async': 850.0}, baseline, 10.0) == [
+        'async: 850人/秒（基準 1,000人/秒, -15.0%）'
+    ]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from calculate_payroll import process_payroll
+from employee_store import (
+    EmployeeStore,
+    RECORD,
+    apply_changes,
+    build_store,
+    process_payroll_from_store,
+)
+
+
+def _by_id(output):
+    return sorted(output['results'], key=lambda r: r['employee_id'])
+
+
+def test_round_trip_matches_process_payroll(input_data, tmp_path):
+    path = str(tmp_path / 'master')
+    build_store(path, input_data['employees'], input_data['attendance'])
+    expected = process_payroll(input_data)
+
+    with EmployeeStore(path) as store:
+        output = process_payroll_from_store(store, input_data['grade_table'])
+
+    assert output['results'] == _by_id(expected)
+    assert output['summary'] == expected['summary']
+    # 整数と小数の区別も保持される
+    for actual, reference in zip(output['results'], _by_id(expected)):
+        for field, value in reference['attendance'].items():
+            assert type(actual['attendance'][field]) is type(value)
+
+
+def test_calculator_reads_store(input_data, tmp_path):
+    path = str(tmp_path / 'master')
+    build_store(path, input_data['employees'], input_data['attendance'])
+    output = process_payroll({'employee_store': path, 'grade_table': input_data['grade_table']})
+    assert output['results'] == _by_id(process_payroll(input_data))
+
+
+def test_fractional_days_round_trip(input_data, tmp_path):
+    path = str(tmp_path / 'master')
+    input_data['attendance'][0]['absence_days'] = 0.5
+    build_store(path, input_data['employees'], input_data['attendance'])
+    with EmployeeStore(path) as store:
+        _, attendance = store.get(input_data['employees'][0]['id'])
+    assert attendance['absence_days'] == 0.5
+
+
+def test_apply_changes(input_data, tmp_path):
+    path = str(tmp_path / 'master')
+    build_store(path, input_data['employees'], input_data['attendance'])
+    hire = dict(input_data['employees'][0], id='A0001')
+    rehire = dict(input_data['employees'][1], name='更新')
+
+    apply_changes(path, [(hire, {}), (rehire, {'absence_days': 2})], ['E00002', 'E00003'])
+
+    with EmployeeStore(path) as store:
+        assert len(store) == len(input_data['employees']) - 1
+        assert store.get('E00002') is None
+        assert store.get('A0001')[0]['base_salary'] == hire['base_salary']
+        assert store.get('E00001')[0]['name'] == '更新'
+        assert store.get('E00001')[1]['absence_days'] == 2
+        ids = [emp['id'] for emp, _ in store]
+        assert ids == sorted(ids)
+
+
+@pytest.mark.parametrize('hires, leavers', [
+    ([({'id': 'N1'}, {}), ({'id': 'N1'}, {})], []),
+    ([({'id': 'N0'}, {}), ({'id': 'N1'}, {})], ['N1']),
+])
+def test_apply_changes_validates_before_writing(input_data, tmp_path, hires, leavers):
+    path = str(tmp_path / 'master')
+    build_store(path, input_data['employees'], input_data['attendance'])
+    template = input_data['employees'][0]
+    hires = [(dict(template, id=emp['id']), att) for emp, att in hires]
+    size = os.path.getsize(path + '.dat')
+
+    with pytest.raises(ValueError):
+        apply_changes(path, hires, leavers)
+
+    assert os.path.getsize(path + '.dat') == size == RECORD.size * len(input_data['employees'])
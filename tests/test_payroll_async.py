@@ -0,0 +1,43 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import payroll_async
+from calculate_payroll import process_payroll
+from payroll_async import iter_payroll_async, process_payroll_async
+
+
+def test_default_pool_is_shared_across_calls(input_data):
+    expected = process_payroll(input_data)
+    assert asyncio.run(process_payroll_async(input_data, chunk_size=30, max_concurrency=2)) == expected
+    pool = payroll_async._shared_executor
+    assert pool is not None
+
+    assert asyncio.run(process_payroll_async(input_data, chunk_size=30, max_concurrency=2)) == expected
+    assert payroll_async._shared_executor is pool
+
+
+def test_private_pool_opt_in(input_data):
+    output = asyncio.run(process_payroll_async(input_data, chunk_size=30, private_pool=True))
+    assert output == process_payroll(input_data)
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(ValueError):
+            asyncio.run(process_payroll_async(input_data, executor=executor, private_pool=True))
+
+
+def test_shared_executor_and_early_stop(input_data):
+    async def take(executor, count):
+        results = []
+        stream = iter_payroll_async(input_data, chunk_size=20, executor=executor)
+        async for result in stream:
+            results.append(result)
+            if len(results) == count:
+                break
+        await stream.aclose()
+        return results
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        results = asyncio.run(take(executor, 50))
+    assert results == process_payroll(input_data)['results'][:50]
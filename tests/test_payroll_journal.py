@@ -0,0 +1,69 @@
+import pytest
+
+from calculate_payroll import process_payroll
+from payroll_journal import process_payroll_checkpointed, read_journal
+
+
+def test_matches_process_payroll(input_data, tmp_path):
+    journal = str(tmp_path / 'payroll.journal')
+    output = process_payroll_checkpointed(input_data, journal, chunk_size=40, fsync_interval=2)
+    assert output == process_payroll(input_data)
+
+
+def test_resume_after_torn_write(input_data, tmp_path):
+    journal = tmp_path / 'payroll.journal'
+    process_payroll_checkpointed(input_data, str(journal), chunk_size=40)
+
+    raw = journal.read_bytes()
+    journal.write_bytes(raw[:len(raw) * 2 // 3])
+    _, committed, _ = read_journal(str(journal))
+    assert 0 < len(committed) < len(input_data['employees'])
+
+    output = process_payroll_checkpointed(input_data, str(journal), chunk_size=40)
+    assert output == process_payroll(input_data)
+    _, committed, _ = read_journal(str(journal))
+    assert len(committed) == len(input_data['employees'])
+
+
+@pytest.mark.parametrize('mutate', [
+    lambda d: d['attendance'][0].update(regular_overtime_hours=99),
+    lambda d: d['employees'][-1].update(base_salary=1),
+    lambda d: d['grade_table']['G1'].update(insurance_rate=0.2),
+])
+def test_refuses_resume_when_input_changed(input_data, tmp_path, mutate):
+    journal = tmp_path / 'payroll.journal'
+    process_payroll_checkpointed(input_data, str(journal), chunk_size=40)
+    raw = journal.read_bytes()
+    journal.write_bytes(raw[:len(raw) // 2])
+
+    mutate(input_data)
+    with pytest.raises(ValueError):
+        process_payroll_checkpointed(input_data, str(journal), chunk_size=40)
+
+
+@pytest.mark.parametrize('content', [b'{"employees": []}\n', b'not a journal', b'\x00\x01\x02'])
+def test_refuses_non_journal_file(input_data, tmp_path, content):
+    path = tmp_path / 'input.json'
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        process_payroll_checkpointed(input_data, str(path), chunk_size=40)
+    assert path.read_bytes() == content
+
+
+def test_empty_file_starts_fresh(input_data, tmp_path):
+    journal = tmp_path / 'payroll.journal'
+    journal.write_bytes(b'')
+    assert process_payroll_checkpointed(input_data, str(journal), chunk_size=40) == process_payroll(input_data)
+
+
+def test_resume_complete_journal_without_recalculation(input_data, tmp_path, monkeypatch):
+    journal = tmp_path / 'payroll.journal'
+    expected = process_payroll_checkpointed(input_data, str(journal), chunk_size=40)
+    size = journal.stat().st_size
+
+    def fail(*args):
+        raise AssertionError('recalculated')
+    monkeypatch.setattr('payroll_journal.calculate_employee_payroll', fail)
+    assert process_payroll_checkpointed(input_data, str(journal), chunk_size=40) == expected
+    assert journal.stat().st_size == size
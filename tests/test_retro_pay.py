@@ -0,0 +1,133 @@
+import copy
+import json
+import sys
+
+import pytest
+
+import calculate_payroll
+import retro_pay
+from calculate_payroll import process_payroll
+from retro_pay import MonthlyHistory, calculate_retro_pay
+
+
+def _write_month(history_dir, month, input_data, indent=2):
+    output = process_payroll(input_data)
+    with open(history_dir / f"{month}.json", 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=indent)
+    return output
+
+
+@pytest.fixture
+def small_input(input_data):
+    input_data['employees'] = input_data['employees'][:20]
+    input_data['attendance'] = input_data['attendance'][:20]
+    return input_data
+
+
+def _result(input_data, emp_id):
+    return next(r for r in process_payroll(input_data)['results'] if r['employee_id'] == emp_id)
+
+
+def test_deltas_match_full_rerun(small_input, tmp_path):
+    for month in ('2024-04', '2024-05', '2024-06'):
+        _write_month(tmp_path, month, small_input, indent=None if month == '2024-05' else 2)
+
+    emp = small_input['employees'][3]
+    changes = [
+        {'employee_id': emp['id'], 'effective_month': '2024-05',
+         'changes': {'base_salary': emp['base_salary'] + 20000}},
+        {'employee_id': emp['id'], 'effective_month': '2024-06', 'changes': {'dependents': 0}},
+        {'employee_id': 'UNKNOWN', 'effective_month': '2024-04', 'changes': {'grade': 'G2'}},
+    ]
+    with MonthlyHistory(str(tmp_path)) as history:
+        output = calculate_retro_pay(history, changes)
+
+    paid = _result(small_input, emp['id'])
+    raised = copy.deepcopy(small_input)
+    raised['employees'][3]['base_salary'] += 20000
+    may = _result(raised, emp['id'])
+    raised['employees'][3]['dependents'] = 0
+    june = _result(raised, emp['id'])
+
+    assert [(d['month'], d['net_pay']) for d in output['deltas']] == [
+        ('2024-05', may['net_pay'] - paid['net_pay']),
+        ('2024-06', june['net_pay'] - paid['net_pay']),
+    ]
+    assert output['deltas'][0]['income_tax'] == (may['statutory_deductions']['income_tax'] -
+                                                 paid['statutory_deductions']['income_tax'])
+    assert output['not_found'] == ['UNKNOWN']
+
+
+def test_later_paid_raise_is_not_clawed_back(small_input, tmp_path):
+    emp = small_input['employees'][0]
+    emp['base_salary'] = 300000
+    for month in ('2024-04', '2024-05', '2024-06'):
+        _write_month(tmp_path, month, small_input)
+    raised = copy.deepcopy(small_input)
+    raised['employees'][0]['base_salary'] = 400000
+    _write_month(tmp_path, '2024-07', raised)
+
+    changes = [{'employee_id': emp['id'], 'effective_month': '2024-04',
+                'changes': {'base_salary': 320000}}]
+    with MonthlyHistory(str(tmp_path)) as history:
+        output = calculate_retro_pay(history, changes)
+
+    assert [d['month'] for d in output['deltas']] == ['2024-04', '2024-05', '2024-06']
+    assert all(d['gross_pay'] > 0 for d in output['deltas'])
+
+
+def test_end_month_limits_change(small_input, tmp_path):
+    for month in ('2024-04', '2024-05', '2024-06'):
+        _write_month(tmp_path, month, small_input)
+    emp = small_input['employees'][1]
+    changes = [{'employee_id': emp['id'], 'effective_month': '2024-04', 'end_month': '2024-05',
+                'changes': {'base_salary': emp['base_salary'] + 10000}}]
+    with MonthlyHistory(str(tmp_path)) as history:
+        output = calculate_retro_pay(history, changes)
+    assert [d['month'] for d in output['deltas']] == ['2024-04', '2024-05']
+
+
+def test_index_is_rebuilt_when_month_file_changes(small_input, tmp_path):
+    _write_month(tmp_path, '2024-04', small_input)
+    emp = small_input['employees'][2]
+    with MonthlyHistory(str(tmp_path)) as history:
+        assert history.get('2024-04', emp['id'])['employee_name'] == emp['name']
+
+    small_input['employees'][2]['name'] = '名前変更後'
+    _write_month(tmp_path, '2024-04', small_input, indent=4)
+    with MonthlyHistory(str(tmp_path)) as history:
+        assert history.get('2024-04', emp['id'])['employee_name'] == '名前変更後'
+        assert history.get('2024-04', 'NOPE') is None
+
+
+def test_changes_after_last_month_are_not_reported_missing(small_input, tmp_path):
+    for month in ('2024-04', '2024-05'):
+        _write_month(tmp_path, month, small_input)
+    emp = small_input['employees'][0]
+    changes = [
+        {'employee_id': emp['id'], 'effective_month': '2024-09', 'changes': {'dependents': 0}},
+        {'employee_id': 'UNKNOWN', 'effective_month': '2024-05', 'changes': {'grade': 'G2'}},
+    ]
+    with MonthlyHistory(str(tmp_path)) as history:
+        output = calculate_retro_pay(history, changes)
+    assert output['deltas'] == []
+    assert output['not_found'] == ['UNKNOWN']
+    assert output['no_affected_months'] == [emp['id']]
+
+
+def test_index_written_with_month_output(small_input, tmp_path, monkeypatch):
+    input_file = tmp_path / 'input.json'
+    input_file.write_text(json.dumps(small_input, ensure_ascii=False), encoding='utf-8')
+    history_dir = tmp_path / 'history'
+    history_dir.mkdir()
+    monkeypatch.setattr(sys, 'argv', ['calculate_payroll.py', str(input_file),
+                                      str(history_dir / '2024-04.json'), '--index'])
+    calculate_payroll.main()
+    assert (history_dir / '2024-04.idx').exists()
+
+    def fail(json_path):
+        raise AssertionError(f"index rebuilt: {json_path}")
+    monkeypatch.setattr(retro_pay, 'build_month_index', fail)
+    emp = small_input['employees'][5]
+    with MonthlyHistory(str(history_dir)) as history:
+        assert history.get('2024-04', emp['id'])['employee_name'] == emp['name']
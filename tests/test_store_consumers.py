@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from calculate_payroll import process_payroll
+from employee_store import EmployeeStore, apply_changes, build_store
+from verify_results import verify_results
+
+
+@pytest.fixture
+def store_path(input_data, tmp_path):
+    path = str(tmp_path / 'master')
+    build_store(path, input_data['employees'], input_data['attendance'])
+    return path
+
+
+def test_verify_results_against_store(input_data, store_path):
+    output = process_payroll(input_data)
+    with EmployeeStore(store_path) as store:
+        assert verify_results(output, output, store)['status'] == 'PASS'
+
+        output['results'][3]['base_salary'] += 1
+        output['results'][4]['attendance']['absence_days'] = 99
+        report = verify_results(output, output, store)
+    assert report['status'] == 'FAIL'
+    assert report['total_errors'] == 2
+
+
+def test_verify_results_reports_leavers(input_data, store_path):
+    output = process_payroll(input_data)
+    leaver = output['results'][0]['employee_id']
+    apply_changes(store_path, [], [leaver])
+
+    with EmployeeStore(store_path) as store:
+        report = verify_results(output, output, store)
+    errors = [r for r in report['verification_results'] if r['status'] == 'ERROR']
+    assert [r['employee_id'] for r in errors] == [leaver]
+
+
+def test_generate_excel_reads_master_from_store(input_data, store_path, tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    from generate_excel import generate_excel
+
+    output_file = tmp_path / 'output.json'
+    output_file.write_text(json.dumps(process_payroll(input_data), ensure_ascii=False), encoding='utf-8')
+    xlsx = str(tmp_path / 'payroll.xlsx')
+    generate_excel(str(output_file), xlsx, store_path)
+
+    wb = openpyxl.load_workbook(xlsx)
+    count = len(input_data['employees'])
+    master = wb['Master']
+    assert [master.cell(row=row, column=1).value for row in range(2, count + 2)] == \
+        [emp['id'] for emp in input_data['employees']]
+    assert master.cell(row=count + 3, column=1).value == "Grade Table"
+    assert wb['Attendance'].cell(row=2, column=7).value == input_data['attendance'][0]['tardiness_count']